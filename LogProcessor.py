@@ -6,11 +6,12 @@ import sys
 import glob
 import csv
 import re
+import mmap
 import shutil
-import io
 import traceback
-import pandas as pd
-from itertools import islice
+import multiprocessing
+import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor
 
 # ——— 全局配置区域 ———
 
@@ -28,28 +29,39 @@ EXT_LOG_DIR = os.path.join(LOG_DIR, '外网')
 
 # 定义总输出文件
 TOTAL_OUT = os.path.join(BASE_DIR, 'total_results.xlsx')
+# CSV 输出文件(巡检数据 / 光功率)
+TOTAL_CSV_OUT = os.path.join(BASE_DIR, 'total_results.csv')
+POWER_CSV_OUT = os.path.join(BASE_DIR, 'power_results.csv')
+
+# 输出表格列顺序
+TOTAL_FIELDS = ('Vendor', 'NetworkType', 'Device', 'SN', 'CPU_Usage(%)',
+                'CPU_Max(%)', 'TotalUsed(KB)', 'UsedPct(%)', 'LogFileName')
+POWER_FIELDS = ('Vendor', 'NetworkType', 'Device', 'Port', 'TX_Power(dBm)',
+                'RX_Power(dBm)', 'Status', 'CommandType', 'LogFileName')
+
+# 定义输出格式 (xlsx / csv)
+output_format = 'xlsx'  # 默认输出Excel
 
 # 定义debug输出是否显示
 enable_show_debug = 'n'  # 默认不显示debug输出
+# 启动时由 enable_show_debug 换算得到的布尔开关，循环中直接判断，避免每次全局查找+字符串比较
+DEBUG = False
+# 当前文件的debug输出缓存，处理完一个文件后一次性打印
+_debug_lines = []
 
 
 # ——— 公共工具函数 ———
-def safe_open(file_path):
-    """安全打开文件，尝试多种编码"""
-    encodings = ['utf-8', 'gbk', 'latin-1']
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                # 测试读取前100行
-                for _ in range(100):
-                    f.readline()
-                # 如果成功，重新打开文件并返回
-                return open(file_path, 'r', encoding=encoding)
-        except (UnicodeDecodeError, LookupError):
-            continue
-    # 所有编码都失败，使用二进制模式读取并尝试解码
-    print(f"警告: 无法用标准编码解码文件 {file_path}，使用二进制模式读取")
-    return open(file_path, 'rb')
+def debug_log(msg):
+    """缓存一条debug输出"""
+    _debug_lines.append(msg)
+
+
+def flush_debug():
+    """一次性打印并清空缓存的debug输出，多进程下同一文件的输出不会被打散"""
+    if _debug_lines:
+        print('\n'.join(_debug_lines))
+        _debug_lines.clear()
+
 
 def ensure_dirs():
     """确保所有必要的日志目录存在
@@ -60,42 +72,123 @@ def ensure_dirs():
         os.makedirs(d, exist_ok=True)
 
 
-def detect_type(fp):
+# 匹配ANSI控制字符和特殊字符(终端分页残留)
+ANSI_RE = re.compile(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', re.ASCII)
+# 厂商关键字匹配('new h3c technologies'包含'h3c',无需单独列出)
+DETECT_RE = re.compile(rb'huawei|h3c', re.IGNORECASE)
+HUAWEI_RE = re.compile(rb'huawei', re.IGNORECASE)
+# 行结束符(文本模式下\r与\r\n都视为换行)
+LINE_END_RE = re.compile(rb'[\r\n]')
+
+
+def read_log(path):
+    """以内存映射方式读取日志文件,识别厂商并解码文本
+    文件内容按需由内核分页载入,类型识别直接在映射上进行,
+    未知类型文件不会被复制或解码; 识别、解析、光功率提取共用同一份文本
+
+    参数:
+        path: 日志文件路径
+    返回:
+        tuple: (厂商类型, 清理后的日志全文), 未知类型时为(None, '')
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, ''  # 空文件无法映射
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            dev_type = detect_type(mm)
+            if dev_type is None:
+                return None, ''
+            return dev_type, decode_log(mm)
+
+
+# 日志解码时依次尝试的编码(部分设备导出的日志为GBK编码)
+LOG_ENCODINGS = ('utf-8', 'gbk')
+
+
+def decode_log(buf):
+    """将日志原始字节解码为文本并移除ANSI控制字符
+    依次按LOG_ENCODINGS严格解码,均失败时按UTF-8解码并忽略无效字节
+
+    参数:
+        buf: 日志文件原始内容(bytes或mmap)
+    返回:
+        str: 清理后的日志全文
+    """
+    for encoding in LOG_ENCODINGS:
+        try:
+            text = str(buf, encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text = str(buf, 'utf-8', 'ignore')
+    if '\x1b' in text or '\x07' in text or '\x08' in text:
+        # 多数巡检日志不含控制字符，先做一次成员检查，避免整段正则替换
+        text = ANSI_RE.sub('', text)
+    if '\r' in text:
+        # 与文本模式读取一致，统一换行符为 \n
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def detect_type(buf):
     """识别日志文件类型(H3C / Huawei)
-    采用分批读取策略,避免一次性加载大文件到内存
-    每次读取batch_size行,直到找到匹配类型或文件结束
+    在原始字节(或mmap)上直接做忽略大小写的正则搜索,无需整段小写复制,
+    按首个含关键字的行判断厂商,同一行中huawei优先于h3c
 
     参数:
-        fp: 日志文件路径
+        buf: 日志文件原始内容(bytes或mmap)
     返回:
         str: 'Huawei'、'H3C'或None(未知类型)
     """
-    batch_size = 100  # 每次检查100行,平衡性能和准确性
-
-    with safe_open(fp) as f:
-        # 如果是二进制模式，需要调整读取方式
-        if isinstance(f, io.BufferedReader):
-            # 处理二进制读取...
-            pass  # 添加pass语句以避免语法错误
-        while True:
-            # 读取当前批次的行并转换为小写,统一匹配规则
-            lines = [line.lower() for line in islice(f, batch_size)]
-            if not lines:
-                break  # 文件读取完毕,未找到匹配类型
-
-            # 检查当前批次的行是否包含特征关键字
-            for line in lines:
-                if 'huawei' in line:
-                    return 'Huawei'
-                if 'h3c' in line or 'new h3c technologies' in line:
-                    return 'H3C'
-    return None
+    m = DETECT_RE.search(buf)
+    if not m:
+        return None
+    if m.group().lower() == b'huawei':
+        return 'Huawei'
+    # 同一行中先出现h3c后出现huawei时仍判为华为(与逐行判断一致)
+    e = LINE_END_RE.search(buf, m.end())
+    if HUAWEI_RE.search(buf, m.end(), e.start() if e else len(buf)):
+        return 'Huawei'
+    return 'H3C'
+
+
+def process_one(path, network_type):
+    """识别并解析单个日志文件(供进程池调用)
+    参数:
+        path: 日志文件路径
+        network_type: 网络类型(内网/外网)
+    返回:
+        tuple: (设备类型, 设备信息列表, 光功率信息列表), 未知类型时两个列表均为空
+    """
+    try:
+        dev_type, text = read_log(path)
+    except OSError as e:
+        print(f"❌ 读取文件错误: {path} - {e}")
+        return None, [], []
+    if dev_type is None:
+        print(f"⚠️ 跳过未知类型文件: {path}")
+        return dev_type, [], []
+    if dev_type == 'H3C':
+        logs = parse_h3c_logs(path, text, 'H3C', network_type)
+    else:
+        logs = parse_huawei_logs(path, text, 'Huawei', network_type)
+    # 提取光功率信息
+    power_info = extract_power_info(path, text, dev_type, network_type)
+    flush_debug()
+    return dev_type, logs, power_info
+
+
+def _init_worker(debug):
+    """进程池初始化: 同步debug开关(Windows下子进程为spawn方式,不会继承主进程中的赋值)"""
+    global DEBUG
+    DEBUG = debug
 
 
 def classify_logs():
     """识别日志文件类型并直接调用解析函数
     遍历logs/内网和logs/外网目录中的.log文件
-    识别每个文件的厂商类型,并直接调用相应的解析函数
+    各文件相互独立,使用进程池并行识别厂商类型并调用相应的解析函数
     """
     print("🔍 分类识别日志...")
     # 存储所有日志信息
@@ -103,46 +196,28 @@ def classify_logs():
     # 存储所有光功率信息
     all_power_info = []
 
-    # 处理内网日志
-    for path in glob.glob(os.path.join(INT_LOG_DIR, '*.log')):
-        dev_type = detect_type(path)
-        if dev_type == 'H3C':
-            logs = parse_h3c_logs(path, 'H3C', '内网')
-            all_logs.extend(logs)
-            # 提取光功率信息
-            power_info = extract_power_info(path, 'H3C', '内网')
-            all_power_info.extend(power_info)
-        elif dev_type == 'Huawei':
-            logs = parse_huawei_logs(path, 'Huawei', '内网')
-            all_logs.extend(logs)
-            # 提取光功率信息
-            power_info = extract_power_info(path, 'Huawei', '内网')
-            all_power_info.extend(power_info)
-        else:
-            print(f"⚠️ 跳过未知类型文件: {path}")
-
-    # 处理外网日志
-    for path in glob.glob(os.path.join(EXT_LOG_DIR, '*.log')):
-        dev_type = detect_type(path)
-        if dev_type == 'H3C':
-            logs = parse_h3c_logs(path, 'H3C', '外网')
-            all_logs.extend(logs)
-            # 提取光功率信息
-            power_info = extract_power_info(path, 'H3C', '外网')
-            all_power_info.extend(power_info)
-        elif dev_type == 'Huawei':
-            logs = parse_huawei_logs(path, 'Huawei', '外网')
-            all_logs.extend(logs)
-            # 提取光功率信息
-            power_info = extract_power_info(path, 'Huawei', '外网')
-            all_power_info.extend(power_info)
-        else:
-            print(f"⚠️ 跳过未知类型文件: {path}")
-
-    # 写入总结果文件
-    write_total_results(all_logs)
-    # 写入光功率结果到Excel
-    write_power_results(all_power_info)
+    # 收集内网和外网日志文件
+    paths = []
+    nets = []
+    for log_dir, network_type in ((INT_LOG_DIR, '内网'), (EXT_LOG_DIR, '外网')):
+        for path in glob.glob(os.path.join(log_dir, '*.log')):
+            paths.append(path)
+            nets.append(network_type)
+
+    if paths:
+        # 默认进程数为CPU核数; map按提交顺序返回结果,保证输出顺序与串行一致
+        with ProcessPoolExecutor(initializer=_init_worker, initargs=(DEBUG,)) as ex:
+            for dev_type, logs, power_info in ex.map(process_one, paths, nets, chunksize=4):
+                all_logs.extend(logs)
+                all_power_info.extend(power_info)
+
+    if output_format == 'csv':
+        # CSV 快速输出(csv模块为C实现，不构建Excel对象树)
+        write_csv(TOTAL_CSV_OUT, all_logs, TOTAL_FIELDS)
+        write_csv(POWER_CSV_OUT, all_power_info, POWER_FIELDS)
+    else:
+        # 写入总结果文件(巡检数据表 + 光功率表)
+        write_all_results(all_logs, all_power_info)
     print("✅ 日志识别与解析完成。")
     return all_logs
 
@@ -151,55 +226,53 @@ def classify_logs():
 
 # 正则表达式定义区 - 提取华为设备信息的关键模式
 # 匹配设备名称模式,支持[]或<>包裹的SD-JN/JY开头的设备标识
-BRACKET_RE = re.compile(r'[\[<](SD-(?:JN|JY)-[^\]>]+)[\]>]+', re.MULTILINE | re.IGNORECASE)
+BRACKET_RE = re.compile(r'[\[<](SD-(?:JN|JY)-[^\]>]+)[\]>]+', re.MULTILINE | re.IGNORECASE | re.ASCII)
 # 匹配设备名称（备用）
-DEVICE_NAME_RE = re.compile(r'Device\s+Name\s*:\s*(\S+)', re.IGNORECASE)
-SYSTEM_NAME_RE = re.compile(r'System\s+Name\s*:\s*(\S+)', re.IGNORECASE)
+DEVICE_NAME_RE = re.compile(r'Device\s+Name\s*:\s*(\S+)', re.IGNORECASE | re.ASCII)
+SYSTEM_NAME_RE = re.compile(r'System\s+Name\s*:\s*(\S+)', re.IGNORECASE | re.ASCII)
 # 匹配条形码信息,提取BarCode=后的非空白字符
-BARCODE_RE = re.compile(r'BarCode=(\S+)')
+BARCODE_RE = re.compile(r'BarCode=(\S+)', re.ASCII)
 # 匹配简单CPU使用率格式 (CPU Usage : x% Max : y%)
 CPU_SIMPLE_RE = re.compile(
-    r'CPU Usage\s*:\s*([\d\.]+)%\s*Max\s*:\s*([\d\.]+)%')
+    r'CPU Usage\s*:\s*([\d\.]+)%\s*Max\s*:\s*([\d\.]+)%', re.ASCII)
 # 匹配控制平面CPU使用率格式 (Control Plane ... CPU Usage: x% Max: y%)
 CPU_CTRL_RE = re.compile(
-    r'Control Plane[\s\S]*?CPU Usage:\s*([\d\.]+)%\s*Max:\s*([\d\.]+)%')
+    r'Control Plane[\s\S]*?CPU Usage:\s*([\d\.]+)%\s*Max:\s*([\d\.]+)%', re.ASCII)
 # 匹配内存使用量 (Total Memory Used Is: x bytes)
-MEM_USED_RE = re.compile(r'Total Memory Used Is:\s*(\d+)\s*bytes')
+MEM_USED_RE = re.compile(r'Total Memory Used Is:\s*(\d+)\s*bytes', re.ASCII)
 # 匹配内存使用率 (Memory Using Percentage Is: x%)
-MEM_PCT_RE = re.compile(r'Memory Using Percentage Is:\s*([\d\.]+)%')
+MEM_PCT_RE = re.compile(r'Memory Using Percentage Is:\s*([\d\.]+)%', re.ASCII)
 
 
-def parse_huawei_logs(fp, vendor, network_type):
+def parse_huawei_logs(fp, txt, vendor, network_type):
     """解析华为设备日志
     参数:
         fp: 日志文件路径
+        txt: 日志全文(已移除ANSI控制字符)
         vendor: 厂商名称
         network_type: 网络类型(内网/外网)
     返回:
         list: 包含设备信息字典的列表
     """
     rows = []
+    log_name = os.path.basename(fp)
     try:
-        with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-            txt = f.read()
-
-        clean_text = re.sub(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', '', txt)
         device = None
         # 在 parse_huawei_logs 和 parse_h3c_logs 函数中使用
         # 修改设备名称提取逻辑
-        m = BRACKET_RE.search(clean_text)
+        m = BRACKET_RE.search(txt)
         if m:
             device = m.group(1)
         else:
-            m = DEVICE_NAME_RE.search(clean_text)
+            m = DEVICE_NAME_RE.search(txt)
             if m:
                 device = m.group(1)
             else:
-                m = SYSTEM_NAME_RE.search(clean_text)
+                m = SYSTEM_NAME_RE.search(txt)
                 if m:
                     device = m.group(1)
                 else:
-                    device = os.path.basename(fp)
+                    device = log_name
                     print(f"警告：未从{fp}中提取到设备名称,使用文件名代替")
 
         info = {
@@ -211,7 +284,7 @@ def parse_huawei_logs(fp, vendor, network_type):
             'UsedPct(%)': f"{float(MEM_PCT_RE.search(txt).group(1)):.2f}%" if MEM_PCT_RE.search(txt) else '',
             'CPU_Usage(%)': '',
             'CPU_Max(%)': '',
-            'LogFileName': os.path.basename(fp)
+            'LogFileName': log_name
         }
 
         m = CPU_CTRL_RE.search(txt) or CPU_SIMPLE_RE.search(txt)
@@ -229,44 +302,68 @@ def parse_huawei_logs(fp, vendor, network_type):
 
 # 复用华为设备名称匹配正则
 DEVNAME_RE = BRACKET_RE
+# 以下三个正则在全文上finditer,空白用[^\S\n]限定在同一行内,与逐行匹配结果一致
 # 匹配内存信息 (Mem: total used free)
-MEM_RE = re.compile(r'Mem:\s*(\d+)\s*(\d+)\s*(\d+)')
+MEM_RE = re.compile(r'Mem:[^\S\n]*(\d+)[^\S\n]*(\d+)[^\S\n]*(\d+)', re.ASCII)
 # 匹配CPU使用率 (xx% in last yy seconds/minutes)
-CPU_RE = re.compile(r'(\d+)% in last\s+(\d+)\s+(seconds?|minutes?)')
+CPU_RE = re.compile(r'(\d+)% in last[^\S\n]+(\d+)[^\S\n]+(seconds?|minutes?)', re.ASCII)
 # 匹配设备序列号 (DEVICE_SERIAL_NUMBER : SNxxx)
-SN_RE = re.compile(r'DEVICE_SERIAL_NUMBER\s*:\s*(\S+)')
+SN_RE = re.compile(r'DEVICE_SERIAL_NUMBER[^\S\n]*:[^\S\n]*(\S+)', re.ASCII)
 
 
-def parse_h3c_logs(fp, vendor, network_type):
+def first_per_line(pattern, txt):
+    """在全文上finditer,只保留每行的首个匹配(与逐行search的结果一致)
+    参数:
+        pattern: 不跨行的已编译正则
+        txt: 日志全文
+    返回:
+        generator: 按行顺序产生的匹配对象
+    """
+    line_start = -2
+    for m in pattern.finditer(txt):
+        start = txt.rfind('\n', 0, m.start())
+        if start != line_start:
+            line_start = start
+            yield m
+
+
+def parse_h3c_logs(fp, txt, vendor, network_type):
     """解析H3C设备日志
+    直接在全文上用 finditer 扫描,不再拆分行列表
     参数:
         fp: 日志文件路径
+        txt: 日志全文(已移除ANSI控制字符)
         vendor: 厂商名称
         network_type: 网络类型(内网/外网)
     返回:
         list: 包含设备信息字典的列表
     """
     rows = []
+    log_name = os.path.basename(fp)
     try:
-        with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.read().splitlines()
-        clean_head = '\n'.join([re.sub(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', '', ln) for ln in lines[:50]])
-        m = DEVNAME_RE.search(clean_head)
-        device = m.group(1) or m.group(2) if m else os.path.basename(fp)
+        # 设备名只在前50行中查找,通过endpos限定范围,无需切片复制
+        head_end = -1
+        for _ in range(50):
+            head_end = txt.find('\n', head_end + 1)
+            if head_end < 0:
+                head_end = len(txt)
+                break
+        m = DEVNAME_RE.search(txt, 0, head_end)
+        device = m.group(1) or m.group(2) if m else log_name
         if not m:
             print(f"警告：未从{fp}中提取到设备名称，使用文件名代替")
         total_kb = used_kb = None
         cpu_stats = {}
         serial = ''
-        for ln in lines:
-            if mm := MEM_RE.search(ln):
-                total_kb, used_kb = map(int, mm.groups()[:2])
-            if mc := CPU_RE.search(ln):
-                pct, num, unit = mc.groups()
-                secs = int(num) * (60 if 'minute' in unit else 1)
-                cpu_stats[secs] = int(pct)
-            if ms := SN_RE.search(ln):
-                serial = ms.group(1)
+        # 每行只取首个匹配,多行出现时以最后一行为准
+        for mm in first_per_line(MEM_RE, txt):
+            total_kb, used_kb = map(int, mm.groups()[:2])
+        for mc in first_per_line(CPU_RE, txt):
+            pct, num, unit = mc.groups()
+            secs = int(num) * (60 if 'minute' in unit else 1)
+            cpu_stats[secs] = int(pct)
+        for ms in first_per_line(SN_RE, txt):
+            serial = ms.group(1)
         used_pct = round(used_kb * 100 / total_kb, 2) if (used_kb and total_kb) else ''
         cpu_min = min(cpu_stats.values()) if cpu_stats else ''
         cpu_max = max(cpu_stats.values()) if cpu_stats else ''
@@ -279,425 +376,498 @@ def parse_h3c_logs(fp, vendor, network_type):
             'CPU_Max(%)': f"{float(cpu_max):.2f}%" if cpu_max else '',
             'TotalUsed(KB)': used_kb or '',
             'UsedPct(%)': f"{used_pct:.2f}%" if used_pct else '',
-            'LogFileName': os.path.basename(fp)
+            'LogFileName': log_name
         })
     except Exception as e:
         print(f"❌ H3C 文件错误: {fp} - {e}")
     return rows
 
 
-def write_total_results(all_logs):
-    """将所有日志信息写入总结果Excel文件的第一个表
+def write_all_results(all_logs, all_power_info):
+    """将巡检数据和光功率信息写入总结果Excel文件
+    xlsxwriter 流式写出且不支持追加,两个表在同一次打开中写入,
+    不再重新加载已有工作簿
     参数:
         all_logs: 包含所有设备信息字典的列表
+        all_power_info: 包含所有光功率信息字典的列表
     """
-    if not all_logs:
+    if not all_logs and not all_power_info:
         print("警告：没有可写入的数据")
         return
 
     try:
-        # 创建DataFrame
-        df = pd.DataFrame(all_logs)
+        workbook = xlsxwriter.Workbook(TOTAL_OUT)
+        try:
+            write_total_results(workbook, all_logs)
+            write_power_results(workbook, all_power_info)
+        finally:
+            workbook.close()
+    except Exception as e:
+        print(f"❌ 保存结果文件错误: {TOTAL_OUT} - {e}")
 
-        # 检查文件是否存在
-        if os.path.exists(TOTAL_OUT):
-            # 读取现有文件
-            writer = pd.ExcelWriter(TOTAL_OUT, engine='openpyxl', mode='a', if_sheet_exists='replace')
-        else:
-            # 创建新文件
-            writer = pd.ExcelWriter(TOTAL_OUT, engine='openpyxl')
 
+def write_sheet(workbook, sheet_name, rows, fields):
+    """逐行写入一个工作表,不构建DataFrame
+    表头样式与 pandas.to_excel 一致(加粗、细边框、居中)
+    参数:
+        workbook: 已打开的 xlsxwriter.Workbook
+        sheet_name: 工作表名称
+        rows: 结果字典列表
+        fields: 列顺序
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    worksheet.write_row(0, 0, fields, header_format)
+    for i, row in enumerate(rows, 1):
+        worksheet.write_row(i, 0, [row[k] for k in fields])
+
+
+def write_total_results(workbook, all_logs):
+    """将所有日志信息写入总结果Excel文件的第一个表
+    参数:
+        workbook: 已打开的总结果文件 xlsxwriter.Workbook
+        all_logs: 包含所有设备信息字典的列表
+    """
+    if not all_logs:
+        print("警告：没有可写入的数据")
+        return
+
+    try:
         # 写入第一个表(巡检数据表)
-        df.to_excel(writer, sheet_name='巡检数据', index=False, columns=[
-            'Vendor', 'NetworkType', 'Device', 'SN', 'CPU_Usage(%)',
-            'CPU_Max(%)', 'TotalUsed(KB)', 'UsedPct(%)', 'LogFileName'
-        ])
-        writer.close()
+        write_sheet(workbook, '巡检数据', all_logs, TOTAL_FIELDS)
 
         print(f"✅ 总结果已写入 {TOTAL_OUT} 的巡检数据表, 共处理 {len(all_logs)} 条记录。")
     except Exception as e:
         print(f"❌ 写入总结果错误: {e}")
 
 
+def write_csv(path, rows, fieldnames):
+    """将结果写入CSV文件
+    使用utf-8-sig编码,Excel可直接打开且中文不乱码
+    参数:
+        path: 输出文件路径
+        rows: 结果字典列表
+        fieldnames: 列顺序
+    """
+    if not rows:
+        print(f"警告：没有可写入 {path} 的数据")
+        return
+
+    try:
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"✅ 结果已写入 {path}, 共处理 {len(rows)} 条记录。")
+    except Exception as e:
+        print(f"❌ 写入CSV错误: {path} - {e}")
+
+
 # ——— 光功率信息提取 ———
 # 非光口（Valid only on/for optical interface）
 NON_OPTICAL_RE = re.compile(
-    r'valid\s+only\s+(?:on|for)\s+optical\s+interface\.?', re.IGNORECASE
+    r'valid\s+only\s+(?:on|for)\s+optical\s+interface\.?', re.IGNORECASE | re.ASCII
 )
 
-# 无模块（transceiver is absent / absent.）
-ABSENT_RE = re.compile(
-    r'transceiver\s+(?:is\s+)?absent\.?', re.IGNORECASE
-)
-
-# 不支持（does not support / not supported / unsupported）
-NOT_SUPPORT_RE = re.compile(
-    r'transceiver\s+(?:does\s+not\s+support|not\s+supported|unsupported)', re.IGNORECASE
+# 无模块（transceiver is absent / absent.）/ 不支持（does not support / not supported / unsupported）
+# 两者前缀同为 transceiver，合并为一个正则，通过 lastgroup 区分
+TRANSCEIVER_STATE_RE = re.compile(
+    r'transceiver\s+(?:(?P<absent>(?:is\s+)?absent)'
+    r'|(?P<not_supported>does\s+not\s+support|not\s+supported|unsupported))',
+    re.IGNORECASE | re.ASCII
 )
 
 # 铜缆接口（Transfer Distance(m) : xxx(copper) 或 (copper)）
 TRANSFER_DISTANCE_COPPER_RE = re.compile(
-    r'Transfer\s+Distance\(m\)\s*:\s*(?:\d+\s*)?\(\s*copper\s*\)', re.IGNORECASE
+    r'Transfer\s+Distance\(m\)\s*:\s*(?:\d+\s*)?\(\s*copper\s*\)', re.IGNORECASE | re.ASCII
 )
 
 # 端口名称（兼容 Huawei/H3C，多类型接口名）
 PORT_RE = re.compile(
     r'(?:^|\s)(?:Port\s+|interface\s+)?'
     r'([A-Za-z\-]+(?:Ethernet)?\d+(?:[\/\-]\d+)+[A-Za-z0-9\/\-]*)',
-    re.IGNORECASE
+    re.IGNORECASE | re.ASCII
 )
 
 # TX/RX Power 通用匹配（兼容 TxPower / RxPower，允许前面有 Current）
-TX_POWER_RE = re.compile(
-    r'(?:Current\s+)?(?:TX\s*Power|TxPower)(?:\s*\(dB[mM]\))?\s*[:=]?\s*(-?\d+(?:\.\d+)?)',
-    re.IGNORECASE
-)
-RX_POWER_RE = re.compile(
-    r'(?:Current\s+)?(?:RX\s*Power|RxPower)(?:\s*\(dB[mM]\))?\s*[:=]?\s*(-?\d+(?:\.\d+)?)',
-    re.IGNORECASE
+# dir 为方向(T/R)，val 为功率值；同时覆盖原备用匹配 (TX|RX)\s*Power\s*[:=]?\s*值
+TX_RX_POWER_RE = re.compile(
+    r'(?:Current\s+)?(?P<dir>[TR])X\s*Power(?:\s*\(dB[mM]\))?\s*[:=]?\s*(?P<val>-?\d+(?:\.\d+)?)',
+    re.IGNORECASE | re.ASCII
 )
 
-# H3C 表格格式光功率匹配(兼容 TxPower / RxPower)
-H3C_TABLE_TX_RE = re.compile(
-    r'TX\s*power\s*\(dB[mM]\)\s*(-?\d+(?:\.\d+)?)',
-    re.IGNORECASE
-)
-H3C_TABLE_RX_RE = re.compile(
-    r'RX\s*power\s*\(dB[mM]\)\s*(-?\d+(?:\.\d+)?)',
-    re.IGNORECASE
-)
-
-# 备用光功率值匹配（极端场景）
-POWER_VALUE_RE = re.compile(
-    r'(TX|RX|Tx|Rx)\s*Power\s*[:=]?\s*(-?\d+(?:\.\d+)?)',
-    re.IGNORECASE
+# H3C 表格格式光功率匹配(兼容 TxPower / RxPower)，分组同上
+H3C_TABLE_POWER_RE = re.compile(
+    r'(?P<dir>[TR])X\s*power\s*\(dB[mM]\)\s*(?P<val>-?\d+(?:\.\d+)?)',
+    re.IGNORECASE | re.ASCII
 )
 
 # 光功率命令匹配（Huawei / H3C）
 
 #display transceiver diagnosis interface
 HUAWEI_DIAG_CMD_RE = re.compile(
-    r'display\s+transceiver\s+diagnosis\s+interface\b', re.IGNORECASE
+    r'display\s+transceiver\s+diagnosis\s+interface\b', re.IGNORECASE | re.ASCII
 )
 #display transceiver diagnosis interface detail
 HUAWEI_DIAG_DETAIL_CMD_RE = re.compile(
-    r'display\s+transceiver\s+diagnosis\s+interface\s+detail\b', re.IGNORECASE
+    r'display\s+transceiver\s+diagnosis\s+interface\s+detail\b', re.IGNORECASE | re.ASCII
 )
 #display transceiver verbose
 HUAWEI_VERB_CMD_RE = re.compile(
-    r'display\s+transceiver\s+verbose\b', re.IGNORECASE
+    r'display\s+transceiver\s+verbose\b', re.IGNORECASE | re.ASCII
 )
 #display transceiver diagnosis interface
 H3C_DIAG_CMD_RE = re.compile(
-    r'display\s+transceiver\s+diagnosis\s+interface\b', re.IGNORECASE
+    r'display\s+transceiver\s+diagnosis\s+interface\b', re.IGNORECASE | re.ASCII
 )
 #display transceiver verbose
 H3C_VERB_CMD_RE = re.compile(
-    r'display\s+transceiver\s+verbose\b', re.IGNORECASE
+    r'display\s+transceiver\s+verbose\b', re.IGNORECASE | re.ASCII
 )
 
 # 通用光功率命令集合
 #display transceiver diagnosis interface
 #display transceiver diagnosis interface detail
 #display transceiver verbose
+# 在全文上扫描，词间空白用 [^\S\n] 限定在同一行内
 ALL_TRANSCEIVER_CMD_RE = re.compile(
-    r'(?:display\s+transceiver\s+(?:diagnosis\s+interface(?:\s+detail)?|verbose)|undo\s+screen-length\s+disable)',
-    re.IGNORECASE
+    r'(?:display[^\S\n]+transceiver[^\S\n]+(?:diagnosis[^\S\n]+interface(?:[^\S\n]+detail)?|verbose)'
+    r'|undo[^\S\n]+screen-length[^\S\n]+disable)',
+    re.IGNORECASE | re.ASCII
 )
-# H3C 多行表格头匹配
+# H3C 多行表格头匹配(固定文本，小写后用 startswith 判断，无需正则)
 #Current diagnostic parameters:
-RE_CURRENT_DIAG = re.compile(r'^Current diagnostic parameters:', re.IGNORECASE)
+CURRENT_DIAG_PREFIX = 'current diagnostic parameters:'
 #Alarm thresholds:
-RE_ALARM_THRESHOLDS = re.compile(r'^Alarm thresholds:', re.IGNORECASE)
+ALARM_THRESHOLDS_PREFIX = 'alarm thresholds:'
+# 多列表格列分隔(两个及以上空白)
+WS2_RE = re.compile(r'\s{2,}', re.ASCII)
+# 命令提示符中的设备名 (<xxx> 或 [xxx])，设备名可能含中文，\w 保持Unicode语义不加 re.ASCII
+PROMPT_RE = re.compile(r'[\[<]([\w\-]+)[\]>]')
+# 端口状态 (status normal / abnormal)
+STATUS_RE = re.compile(r'status\s+(normal|abnormal)', re.IGNORECASE | re.ASCII)
+
+# 光功率事件行匹配：状态机中任一判断可能命中的行都会被该正则匹配到(宽松超集)，
+# 其余行对状态机不产生影响，整段文本交由正则引擎跳过，无需逐行进入Python循环
+POWER_EVENT_RE = re.compile(
+    r'display\s+transceiver'                                  # 命令类型
+    r'|(?<!\S)(?:Port\s+|interface\s+)?'
+    r'[A-Za-z\-]+(?:Ethernet)?\d+(?:[\/\-]\d+)+'                # 端口名称
+    r'|valid\s+only'                                          # 非光口
+    r'|transceiver\s+(?:is\s+absent|absent|does\s+not\s+support|not\s+supported|unsupported)'
+    r'|Transfer\s+Distance'                                   # 电口
+    r'|Current diagnostic parameters:|Alarm thresholds:'      # 诊断/告警区块
+    r'|Temp\.'                                                # 多列表格头
+    r'|[TR]X\s*Power'                                         # TX/RX功率
+    r'|status\s+(?:normal|abnormal)',                         # 状态
+    re.IGNORECASE | re.ASCII
+)
+
+
+class PortState:
+    """光功率状态机中当前端口的解析状态"""
+    __slots__ = ('current_port', 'tx_power', 'rx_power', 'status', 'is_optical_port', 'command_type',
+                 'table_header_found', 'rx_power_col_idx', 'tx_power_col_idx', 'parsing_power_data')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """保存后重置端口信息，防止数据混淆"""
+        self.current_port = None  # 当前正在处理的端口名称
+        self.tx_power = None     # 发送功率值 (dBm)
+        self.rx_power = None     # 接收功率值 (dBm)
+        self.status = 'unknown'  # 端口状态 (unknown/non_optical/absent/not_supported/copper_port)
+        self.is_optical_port = False  # 是否为光口
+        self.command_type = "unknown"  # 命令类型 (huawei_diag/huawei_diag_detail/huawei_verb/h3c_diag/h3c_verb)
+        # 重置表格相关变量，防止跨端口干扰
+        self.table_header_found = False  # 是否已找到表格头部
+        self.rx_power_col_idx = None     # 接收功率在表格中的列索引
+        self.tx_power_col_idx = None     # 发送功率在表格中的列索引
+        self.parsing_power_data = False
+
+
+def flush_port(state, power_info, vendor, network_type, device, log_name):
+    """保存当前端口信息并重置状态
+    参数:
+        state: 当前端口解析状态 PortState
+        power_info: 光功率信息输出列表
+        vendor: 厂商名称
+        network_type: 网络类型(内网/外网)
+        device: 设备名称
+        log_name: 日志文件名
+    """
+    if state.current_port and (state.tx_power is not None or state.rx_power is not None or state.status != 'unknown'):
+        power_info.append({
+            'Vendor': vendor,
+            'NetworkType': network_type,
+            'Device': device,
+            'Port': state.current_port,
+            'TX_Power(dBm)': state.tx_power,
+            'RX_Power(dBm)': state.rx_power,
+            'Status': state.status,
+            'CommandType': state.command_type,
+            'LogFileName': log_name
+        })
+        if DEBUG:
+            debug_log(f"[DEBUG] 保存设备 {device} 端口: {state.current_port}，TX: {state.tx_power}，RX: {state.rx_power}，状态: {state.status}，命令类型: {state.command_type}")
+    state.reset()
+
+
+def _event_lines(text, start, end, state):
+    """只产出需要状态机处理的行：命中事件正则的行，以及多列表格头之后的数据行
+    直接在全文的 [start, end) 区间内查找，不复制分段文本
+    参数:
+        text: 日志全文
+        start, end: 当前光功率命令段在全文中的起止偏移
+        state: 当前端口解析状态 PortState(每产出一行后重新读取 table_header_found)
+    返回:
+        generator: 行文本(不含换行符)
+    """
+    pos = start
+    while pos < end:
+        if state.table_header_found:
+            # 表头后紧跟的数据行无论内容如何都需处理
+            line_start = pos
+        else:
+            m = POWER_EVENT_RE.search(text, pos, end)
+            if not m:
+                return
+            line_start = text.rfind('\n', 0, m.start()) + 1
+        line_end = text.find('\n', line_start, end)
+        if line_end < 0:
+            line_end = end
+        yield text[line_start:line_end]
+        pos = line_end + 1
 
 
 # 提取光功率信息
-def extract_power_info(fp, vendor, network_type):
-    """提取设备光功率信息（优化版，支持设备名提取 & 非光口过滤 & 电口跳过）"""
+def extract_power_info(fp, clean_text, vendor, network_type):
+    """提取设备光功率信息（优化版，支持设备名提取 & 非光口过滤 & 电口跳过）
+    clean_text 为 decode_log 解码后的全文，按字符偏移分段，不拆分行列表"""
     power_info = []
+    log_name = os.path.basename(fp)
     try:
-        with safe_open(fp) as f:
-            lines = f.read().splitlines()
-            if enable_show_debug == 'y':
-                print(f"[DEBUG] 打开文件 {fp}，读取行数: {len(lines)}")
+        if DEBUG:
+            debug_log(f"[DEBUG] 处理文件 {fp}，行数: {clean_text.count(chr(10)) + (not clean_text.endswith(chr(10)))}")
 
         # === 1. 全文设备名提取 ===
-        clean_text = '\n'.join(re.sub(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', '', ln) for ln in lines)
-        m = re.search(r'[\[<]([\w\-]+)[\]>]', clean_text)  # 优先匹配提示符
+        m = PROMPT_RE.search(clean_text)  # 优先匹配提示符
         if not m:#复用huawei的设备名称提取
             m = BRACKET_RE.search(clean_text)
         if not m:
-            DEVICE_NAME_RE = re.compile(r'Device\s+Name\s*:\s*(\S+)', re.IGNORECASE)
-            SYSTEM_NAME_RE = re.compile(r'System\s+Name\s*:\s*(\S+)', re.IGNORECASE)
             m = DEVICE_NAME_RE.search(clean_text) or SYSTEM_NAME_RE.search(clean_text)
-        device = m.group(1) if m else os.path.basename(fp)
-        if enable_show_debug == 'y':
-            print(f"[DEBUG] 识别设备名: {device}")
-
-        # === 2. 找所有光功率命令行索引，构成分段 ===
-        cmd_indices = [i for i, line in enumerate(lines) if ALL_TRANSCEIVER_CMD_RE.search(line)]
-        if not cmd_indices:
-            if enable_show_debug == 'y':
-                print(f"[DEBUG] 警告：设备 {device} 在{fp}中未找到光功率相关命令")
+        device = m.group(1) if m else log_name
+        if DEBUG:
+            debug_log(f"[DEBUG] 识别设备名: {device}")
+
+        # === 2. 一次扫描全文找所有光功率命令所在行的起始偏移，构成分段 ===
+        cmd_offsets = []
+        for m in ALL_TRANSCEIVER_CMD_RE.finditer(clean_text):
+            line_start = clean_text.rfind('\n', 0, m.start()) + 1
+            if not cmd_offsets or cmd_offsets[-1] != line_start:  # 同一行多次命中只算一段
+                cmd_offsets.append(line_start)
+        if not cmd_offsets:
+            if DEBUG:
+                debug_log(f"[DEBUG] 警告：设备 {device} 在{fp}中未找到光功率相关命令")
             return []
-        cmd_indices.append(len(lines))  # 加日志末尾作为边界
-        if enable_show_debug == 'y':
-            print(f"[DEBUG] 设备 {device} 识别到光功率命令段数: {len(cmd_indices)-1}")
+        cmd_offsets.append(len(clean_text))  # 加日志末尾作为边界
+        if DEBUG:
+            debug_log(f"[DEBUG] 设备 {device} 识别到光功率命令段数: {len(cmd_offsets)-1}")
 
         # 逐段处理
-        for idx, (start, end) in enumerate(zip(cmd_indices, cmd_indices[1:]), 1):  # 从1开始计数
-            segment = lines[start:end]
-            if enable_show_debug == 'y':
-                print(f"[DEBUG] 设备 {device} 处理第 {idx} 段日志，行数: {len(segment)}，起始行号: {start}")
+        for idx, (start, end) in enumerate(zip(cmd_offsets, cmd_offsets[1:]), 1):  # 从1开始计数
+            if DEBUG:
+                debug_log(f"[DEBUG] 设备 {device} 处理第 {idx} 段日志，行数: {clean_text.count(chr(10), start, end)}，"
+                          f"起始行号: {clean_text.count(chr(10), 0, start)}")
 
 
             # === 3. 状态机解析 ===
-            current_port = None  # 当前正在处理的端口名称
-            tx_power = None     # 发送功率值 (dBm)
-            rx_power = None     # 接收功率值 (dBm)
-            status = 'unknown'  # 端口状态 (unknown/non_optical/absent/not_supported/copper_port)
-            is_optical_port = False  # 是否为光口
-            command_type = "unknown"  # 命令类型 (huawei_diag/huawei_diag_detail/huawei_verb/h3c_diag/h3c_verb)
-            # 针对多列表格的解析状态和列索引变量
-            table_header_found = False  # 是否已找到表格头部
-            rx_power_col_idx = None     # 接收功率在表格中的列索引
-            tx_power_col_idx = None     # 发送功率在表格中的列索引
-
-            # 保存当前端口信息
-            def save_port():
-                nonlocal current_port, tx_power, rx_power, status, is_optical_port,table_header_found, rx_power_col_idx, tx_power_col_idx, parsing_power_data,command_type
-                if current_port and (tx_power is not None or rx_power is not None or status != 'unknown'):
-                    power_info.append({
-                        'Vendor': vendor,
-                        'NetworkType': network_type,
-                        'Device': device,
-                        'Port': current_port,
-                        'TX_Power(dBm)': tx_power,
-                        'RX_Power(dBm)': rx_power,
-                        'Status': status,
-                        'CommandType': command_type,
-                        'LogFileName': os.path.basename(fp)
-                    })
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 保存设备 {device} 端口: {current_port}，TX: {tx_power}，RX: {rx_power}，状态: {status}，命令类型: {command_type}")
-
-                # 保存后重置端口信息，防止数据混淆
-                current_port = None
-                tx_power = None
-                rx_power = None
-                status = 'unknown'
-                is_optical_port = False
-                command_type = "unknown"
-                # 重置表格相关变量，防止跨端口干扰
-                table_header_found = False
-                rx_power_col_idx = None
-                tx_power_col_idx = None
-                parsing_power_data = False
-                table_header_found = False
-
-            for line in segment:
+            state = PortState()
+
+            for line in _event_lines(clean_text, start, end, state):
                 line = line.strip()
-                # 识别命令类型
-                if vendor == 'Huawei':
-                    if HUAWEI_DIAG_CMD_RE.search(line):
-                        command_type = "huawei_diag"
-                    elif HUAWEI_DIAG_DETAIL_CMD_RE.search(line):
-                        command_type = "huawei_diag_detail"
-                    elif HUAWEI_VERB_CMD_RE.search(line):
-                        command_type = "huawei_verb"
-                elif vendor == 'H3C':
-                    if H3C_DIAG_CMD_RE.search(line):
-                        command_type = "h3c_diag"
-                    elif H3C_VERB_CMD_RE.search(line):
-                        command_type = "h3c_verb"
+                line_lower = line.lower()
+                # 识别命令类型(命令行必含 transceiver，先做子串预筛再跑正则)
+                if 'transceiver' in line_lower:
+                    if vendor == 'Huawei':
+                        if HUAWEI_DIAG_CMD_RE.search(line):
+                            state.command_type = "huawei_diag"
+                        elif HUAWEI_DIAG_DETAIL_CMD_RE.search(line):
+                            state.command_type = "huawei_diag_detail"
+                        elif HUAWEI_VERB_CMD_RE.search(line):
+                            state.command_type = "huawei_verb"
+                    elif vendor == 'H3C':
+                        if H3C_DIAG_CMD_RE.search(line):
+                            state.command_type = "h3c_diag"
+                        elif H3C_VERB_CMD_RE.search(line):
+                            state.command_type = "h3c_verb"
 
                 # 匹配端口
                 port_match = PORT_RE.search(line)
                 if port_match:
-                    save_port()
-                    current_port = port_match.group(1)
-                    is_optical_port = True
-                    status = 'unknown'
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 发现设备{device}端口: {current_port}，默认光口，命令类型: {command_type}")
+                    flush_port(state, power_info, vendor, network_type, device, log_name)
+                    state.current_port = port_match.group(1)
+                    state.is_optical_port = True
+                    state.status = 'unknown'
+                    if DEBUG:
+                        debug_log(f"[DEBUG] 发现设备{device}端口: {state.current_port}，默认光口，命令类型: {state.command_type}")
                     continue
 
                 # 非光口 / 无模块 / 不支持 / 电口 状态判断及标记状态
                 if NON_OPTICAL_RE.search(line):
-                    status = 'non_optical(非光口)'
-                    is_optical_port = False
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 设备 {device} 端口{current_port}检测为非光口")
-                    continue
-                if ABSENT_RE.search(line):
-                    status = 'absent(无模块)'
-                    is_optical_port = False
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 设备 {device} 端口{current_port}检测为无模块")
+                    state.status = 'non_optical(非光口)'
+                    state.is_optical_port = False
+                    if DEBUG:
+                        debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port}检测为非光口")
                     continue
-                if NOT_SUPPORT_RE.search(line):
-                    status = 'not_supported(不支持)'
-                    is_optical_port = False
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 设备 {device} 端口{current_port}检测为不支持")
+                state_match = TRANSCEIVER_STATE_RE.search(line)
+                if state_match:
+                    state.is_optical_port = False
+                    if state_match.lastgroup == 'absent':
+                        state.status = 'absent(无模块)'
+                        if DEBUG:
+                            debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port}检测为无模块")
+                    else:
+                        state.status = 'not_supported(不支持)'
+                        if DEBUG:
+                            debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port}检测为不支持")
                     continue
-                if current_port is not None and TRANSFER_DISTANCE_COPPER_RE.search(line):
-                    status = 'copper_port(电口)'
-                    is_optical_port = False
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 设备 {device} 端口{current_port}检测为电口")
+                if state.current_port is not None and TRANSFER_DISTANCE_COPPER_RE.search(line):
+                    state.status = 'copper_port(电口)'
+                    state.is_optical_port = False
+                    if DEBUG:
+                        debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port}检测为电口")
                     continue
 
                 # 非光口跳过
-                if not is_optical_port:
+                if not state.is_optical_port:
                     continue
 
                 # 控制诊断数据区块开关
-                if vendor in ('H3C', 'Huawei') and RE_CURRENT_DIAG.search(line):
-                    parsing_power_data = True
+                if vendor in ('H3C', 'Huawei') and line_lower.startswith(CURRENT_DIAG_PREFIX):
+                    state.parsing_power_data = True
                     continue
                 # 控制告警阈值区块开关
-                if vendor in ('H3C', 'Huawei') and RE_ALARM_THRESHOLDS.search(line):
-                    parsing_power_data = False
-                    table_header_found = False  # 遇到告警阈值段，重置表头标志
+                if vendor in ('H3C', 'Huawei') and line_lower.startswith(ALARM_THRESHOLDS_PREFIX):
+                    state.parsing_power_data = False
+                    state.table_header_found = False  # 遇到告警阈值段，重置表头标志
                     continue
                 # 多列表格头检测
                 if vendor in ('H3C', 'Huawei') and 'Temp.' in line and 'Voltage' in line and 'RX power' in line and 'TX power' in line:
-                    table_header_found = True
-                    headers = re.split(r'\s{2,}', line.strip())
+                    state.table_header_found = True
+                    headers = WS2_RE.split(line)
                     try:
-                        rx_power_col_idx = next(i for i, h in enumerate(headers) if 'RX power' in h)
-                        tx_power_col_idx = next(i for i, h in enumerate(headers) if 'TX power' in h)
-                        if enable_show_debug == 'y':
-                            print(f"[DEBUG] 设备 {device} 多列表格检测到功率列 RX: {rx_power_col_idx}, TX: {tx_power_col_idx}")
+                        state.rx_power_col_idx = next(i for i, h in enumerate(headers) if 'RX power' in h)
+                        state.tx_power_col_idx = next(i for i, h in enumerate(headers) if 'TX power' in h)
+                        if DEBUG:
+                            debug_log(f"[DEBUG] 设备 {device} 多列表格检测到功率列 RX: {state.rx_power_col_idx}, TX: {state.tx_power_col_idx}")
 
                     except StopIteration:
-                        rx_power_col_idx = None
-                        tx_power_col_idx = None
-                        if enable_show_debug == 'y':
-                            print(f"[DEBUG] 设备 {device} 多列表格未检测到功率列")
+                        state.rx_power_col_idx = None
+                        state.tx_power_col_idx = None
+                        if DEBUG:
+                            debug_log(f"[DEBUG] 设备 {device} 多列表格未检测到功率列")
                     continue
 
                 # 紧跟表头后的数据行，解析功率
-                if table_header_found:
-                    columns = re.split(r'\s{2,}', line.strip())
-                    if rx_power_col_idx is not None and rx_power_col_idx < len(columns):
+                if state.table_header_found:
+                    columns = WS2_RE.split(line)
+                    if state.rx_power_col_idx is not None and state.rx_power_col_idx < len(columns):
                         try:
-                            val = float(columns[rx_power_col_idx])
+                            val = float(columns[state.rx_power_col_idx])
                             if -50 <= val <= 10:
-                                rx_power = val
-                                if enable_show_debug == 'y':
-                                    print(f"[DEBUG] 设备 {device} 端口{current_port} 多列表格 RX功率: {rx_power} dBm")
+                                state.rx_power = val
+                                if DEBUG:
+                                    debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} 多列表格 RX功率: {state.rx_power} dBm")
                         except Exception as e:
-                            if enable_show_debug == 'y':
-                                print(f"[WARN] 设备 {device} 端口{current_port} 多列表格 RX功率解析错误: {e}")
-                    if tx_power_col_idx is not None and tx_power_col_idx < len(columns):
+                            if DEBUG:
+                                debug_log(f"[WARN] 设备 {device} 端口{state.current_port} 多列表格 RX功率解析错误: {e}")
+                    if state.tx_power_col_idx is not None and state.tx_power_col_idx < len(columns):
                         try:
-                            val = float(columns[tx_power_col_idx])
+                            val = float(columns[state.tx_power_col_idx])
                             if -50 <= val <= 10:
-                                tx_power = val
-                                if enable_show_debug == 'y':
-                                    print(f"[DEBUG] 设备 {device} 端口{current_port} 多列表格 TX功率: {tx_power} dBm")
+                                state.tx_power = val
+                                if DEBUG:
+                                    debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} 多列表格 TX功率: {state.tx_power} dBm")
                         except Exception as e:
-                            if enable_show_debug == 'y':
-                                print(f"[WARN] 设备 {device} 端口{current_port} 多列表格 TX功率解析错误: {e}")
-                    table_header_found = False  # 只处理一行数据
+                            if DEBUG:
+                                debug_log(f"[WARN] 设备 {device} 端口{state.current_port} 多列表格 TX功率解析错误: {e}")
+                    state.table_header_found = False  # 只处理一行数据
                     continue
 
-                # 匹配TX功率
-                tx_match = TX_POWER_RE.search(line)
+                # 匹配TX/RX功率(一次扫描，每个方向取该行第一个匹配)
+                tx_match = rx_match = None
+                for pm in TX_RX_POWER_RE.finditer(line):
+                    if pm['dir'] in 'Tt':
+                        tx_match = tx_match or pm
+                    else:
+                        rx_match = rx_match or pm
                 if tx_match:
                     try:
-                        val = float(tx_match.group(1))
+                        val = float(tx_match['val'])
                         if -50 <= val <= 10:  # 合理范围内才赋值
-                            tx_power = val
-                            if enable_show_debug == 'y':
-                                print(f"[DEBUG] 设备 {device} 端口{current_port} TX功率: {val} dBm")
+                            state.tx_power = val
+                            if DEBUG:
+                                debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} TX功率: {val} dBm")
                     except ValueError:
-                        if enable_show_debug == 'y':
-                            print(f"[DEBUG] 设备 {device} 端口{current_port} TX功率解析错误: {tx_match.group(1)}")
+                        if DEBUG:
+                            debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} TX功率解析错误: {tx_match['val']}")
                         pass
 
-                # 匹配RX功率
-                rx_match = RX_POWER_RE.search(line)
                 if rx_match:
                     try:
-                        val = float(rx_match.group(1))
+                        val = float(rx_match['val'])
                         if -50 <= val <= 10:
-                            rx_power = val
-                            if enable_show_debug == 'y':
-                                print(f"[DEBUG] 设备 {device} 端口{current_port} RX功率: {val} dBm")
+                            state.rx_power = val
+                            if DEBUG:
+                                debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} RX功率: {val} dBm")
                     except ValueError:
-                        if enable_show_debug == 'y':
-                            print(f"[DEBUG] 设备 {device} 端口{current_port} RX功率解析错误: {rx_match.group(1)}")
+                        if DEBUG:
+                            debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} RX功率解析错误: {rx_match['val']}")
                         pass
 
                 # H3C表格格式匹配
                 if vendor == 'H3C':
-                    h3c_tx_match = H3C_TABLE_TX_RE.search(line)
+                    h3c_tx_match = h3c_rx_match = None
+                    for pm in H3C_TABLE_POWER_RE.finditer(line):
+                        if pm['dir'] in 'Tt':
+                            h3c_tx_match = h3c_tx_match or pm
+                        else:
+                            h3c_rx_match = h3c_rx_match or pm
                     if h3c_tx_match:
                         try:
-                            val = float(h3c_tx_match.group(1))
+                            val = float(h3c_tx_match['val'])
                             if -50 <= val <= 10:
-                                tx_power = val
-                                if enable_show_debug == 'y':
-                                    print(f"[DEBUG] 设备 {device} 端口{current_port} H3C TX功率: {val} dBm")
+                                state.tx_power = val
+                                if DEBUG:
+                                    debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} H3C TX功率: {val} dBm")
                         except ValueError:
-                            if enable_show_debug == 'y':
-                                print(f"[DEBUG] 设备 {device} 端口{current_port} H3C TX功率解析错误: {h3c_tx_match.group(1)}")
+                            if DEBUG:
+                                debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} H3C TX功率解析错误: {h3c_tx_match['val']}")
                             pass
 
-                    h3c_rx_match = H3C_TABLE_RX_RE.search(line)
                     if h3c_rx_match:
                         try:
-                            val = float(h3c_rx_match.group(1))
+                            val = float(h3c_rx_match['val'])
                             if -50 <= val <= 10:
-                                rx_power = val
-                                if enable_show_debug == 'y':
-                                    print(f"[DEBUG] 设备 {device} 端口{current_port} H3C RX功率: {val} dBm")
+                                state.rx_power = val
+                                if DEBUG:
+                                    debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} H3C RX功率: {val} dBm")
                         except ValueError:
-                            if enable_show_debug == 'y':
-                                print(f"[DEBUG] 设备 {device} 端口{current_port} H3C RX功率解析错误: {h3c_rx_match.group(1)}")
-                            pass
-
-                # 备用功率匹配
-                if tx_power is None:
-                    pm = POWER_VALUE_RE.search(line)
-                    if pm and pm.group(1).lower() == 'tx':
-                        try:
-                            val = float(pm.group(2))
-                            if -50 <= val <= 10:
-                                tx_power = val
-                                if enable_show_debug == 'y':
-                                    print(f"[DEBUG] 设备 {device} 端口{current_port} 备用TX功率: {val} dBm")
-                        except ValueError:
-                            if enable_show_debug == 'y':
-                                print(f"[DEBUG] 设备 {device} 端口{current_port} 备用TX功率解析错误: {pm.group(2)}")
-                            pass
-
-                if rx_power is None:
-                    pm = POWER_VALUE_RE.search(line)
-                    if pm and pm.group(1).lower() == 'rx':
-                        try:
-                            val = float(pm.group(2))
-                            if -50 <= val <= 10:
-                                rx_power = val
-                                if enable_show_debug == 'y':
-                                    print(f"[DEBUG] 设备 {device} 端口{current_port} 备用RX功率: {val} dBm")
-                        except ValueError:
-                            if enable_show_debug == 'y':
-                                print(f"[DEBUG] 设备 {device} 端口{current_port} 备用RX功率解析错误: {pm.group(2)}")
+                            if DEBUG:
+                                debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} H3C RX功率解析错误: {h3c_rx_match['val']}")
                             pass
 
                 # 匹配状态 normal/abnormal
-                status_match = re.search(r'status\s+(normal|abnormal)', line, re.IGNORECASE)
+                status_match = STATUS_RE.search(line)
                 if status_match:
-                    status = status_match.group(1)
-                    if enable_show_debug == 'y':
-                        print(f"[DEBUG] 设备 {device} 端口{current_port} 状态: {status}")
+                    state.status = status_match.group(1)
+                    if DEBUG:
+                        debug_log(f"[DEBUG] 设备 {device} 端口{state.current_port} 状态: {state.status}")
 
             # 循环结束保存最后一个端口
-            save_port()
+            flush_port(state, power_info, vendor, network_type, device, log_name)
     except Exception as e:
         print(f"❌ 光功率提取错误: {fp} - {e}")
         print(traceback.format_exc())
@@ -705,9 +875,10 @@ def extract_power_info(fp, vendor, network_type):
     return power_info
 
 
-def write_power_results(power_info):
+def write_power_results(workbook, power_info):
     """将光功率信息写入Excel文件的sheet2
     参数:
+        workbook: 已打开的总结果文件 xlsxwriter.Workbook
         power_info: 包含所有光功率信息字典的列表
     """
     if not power_info:
@@ -715,20 +886,8 @@ def write_power_results(power_info):
         return
 
     try:
-        # 创建DataFrame
-        df = pd.DataFrame(power_info)
-
-        # 检查文件是否存在
-        if os.path.exists(TOTAL_OUT):
-            # 读取现有文件
-            writer = pd.ExcelWriter(TOTAL_OUT, engine='openpyxl', mode='a', if_sheet_exists='replace')
-        else:
-            # 创建新文件
-            writer = pd.ExcelWriter(TOTAL_OUT, engine='openpyxl')
-
         # 写入光功率
-        df.to_excel(writer, sheet_name='光功率', index=False)
-        writer.close()
+        write_sheet(workbook, '光功率', power_info, POWER_FIELDS)
 
         print(f"✅ 光功率信息已写入 {TOTAL_OUT} 的光功率表, 共处理 {len(power_info)} 条记录。")
     except Exception as e:
@@ -750,6 +909,11 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包为EXE后使用进程池需要调用freeze_support
+    multiprocessing.freeze_support()
     # 获取用户输入，是否显示debug命令输出（默认不显示）
     enable_show_debug = input("是否显示debug命令输出？(y/n, 默认n): ").strip().lower() or 'n'
+    DEBUG = enable_show_debug == 'y'
+    # 获取用户输入，输出格式（默认xlsx）
+    output_format = 'csv' if input("输出格式？(xlsx/csv, 默认xlsx): ").strip().lower() == 'csv' else 'xlsx'
     main()
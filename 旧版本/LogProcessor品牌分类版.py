@@ -4,11 +4,13 @@
 
 import os
 import sys
-import glob
 import csv
-import re
+import io
 import shutil
-from itertools import islice
+import contextlib
+import re
+import mmap
+import multiprocessing
 
 # ——— 全局配置区域 ———
 
@@ -24,9 +26,24 @@ H3C_LOG_DIR = os.path.join(LOG_DIR, 'h3c_logs')
 HW_LOG_DIR = os.path.join(LOG_DIR, 'huawei_logs')
 H3C_OUT = os.path.join(BASE_DIR, 'h3c_results.csv')
 HW_OUT = os.path.join(BASE_DIR, 'huawei_results.csv')
+# CSV表头,解析结果按此顺序组成元组行
+CSV_FIELDS = ('Device', 'SN', 'CPU_Usage(%)', 'CPU_Max(%)',
+              'TotalUsed(bytes)', 'UsedPct(%)', 'LogFileName')
 
 # ——— 公共工具函数 ———
 
+# ANSI控制字符和特殊字符(终端翻页产生),匹配设备名称前移除
+ANSI_RE = re.compile(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', re.ASCII)
+
+
+def strip_ansi(text):
+    """移除ANSI控制字符和特殊字符
+    多数行不含控制字符,先做成员检查,此时直接返回原字符串,不做正则替换和复制
+    """
+    if '\x1b' in text or '\x07' in text or '\x08' in text:
+        return ANSI_RE.sub('', text)
+    return text
+
 
 def ensure_dirs():
     """确保所有必要的日志目录存在
@@ -37,55 +54,76 @@ def ensure_dirs():
         os.makedirs(d, exist_ok=True)
 
 
-def detect_type(fp):
-    """识别日志文件类型(H3C / Huawei)
-    采用分批读取策略,避免一次性加载大文件到内存
-    每次读取batch_size行,直到找到匹配类型或文件结束
+# 厂商关键字匹配('new h3c technologies'包含'h3c',无需单独列出)
+DETECT_RE = re.compile(rb'huawei|h3c', re.IGNORECASE)
+HUAWEI_RE = re.compile(rb'huawei', re.IGNORECASE)
+# 行结束符(文本模式下\r与\r\n都视为换行)
+LINE_END_RE = re.compile(rb'[\r\n]')
+
+
+def list_logs(log_dir):
+    """列出目录中的.log日志文件
+    直接遍历os.scandir的目录项,文件类型来自目录项本身,无需glob的模式匹配和额外stat调用;
+    与glob('*.log')一致: 忽略以'.'开头的隐藏文件,Windows下扩展名不区分大小写
 
     参数:
-        fp: 日志文件路径
+        log_dir: 日志目录
     返回:
-        str: 'Huawei'、'H3C'或None(未知类型)
+        list: 日志文件路径列表
     """
-    batch_size = 100  # 每次检查100行,平衡性能和准确性
-    with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-        while True:
-            # 读取当前批次的行并转换为小写,统一匹配规则
-            lines = [line.lower() for line in islice(f, batch_size)]
-            if not lines:
-                break  # 文件读取完毕,未找到匹配类型
-
-            # 检查当前批次的行是否包含特征关键字
-            for line in lines:
-                if 'huawei' in line:
-                    return 'Huawei'
-                if 'h3c' in line or 'new h3c technologies' in line:
-                    return 'H3C'
-    return None
+    with os.scandir(log_dir) as entries:
+        return [e.path for e in entries
+                if os.path.normcase(e.name).endswith('.log') and not e.name.startswith('.')
+                and e.is_file()]
 
 
-def classify_logs():
-    """将日志文件分类移动到对应厂商的子目录
-    遍历LOG_DIR中的.log文件,调用detect_type识别类型
-    根据识别结果移动到H3C_LOG_DIR或HW_LOG_DIR
-    已存在文件会跳过移动并给出警告
+def move_log(src, dest):
+    """移动日志文件,目标已存在时抛出FileExistsError而不覆盖
+    用一次系统调用同时完成存在性检查和移动,无需先调用os.path.exists;
+    文件系统不支持硬链接时退回为先检查目标再移动
+
+    参数:
+        src: 源文件路径
+        dest: 目标文件路径
     """
-    print("🔍 分类整理日志...")
-    # 仅处理.log文件,可根据需要扩展支持其他格式
-    for path in glob.glob(os.path.join(LOG_DIR, '*.log')):
-        dev = detect_type(path)
-        if dev == 'H3C':
-            # 添加文件存在性检查,避免覆盖已有文件
-            dest_path = os.path.join(H3C_LOG_DIR, os.path.basename(path))
-            if os.path.exists(dest_path):
-                print(f"⚠️ {dest_path}已存在,跳过移动")
-            else:
-                shutil.move(path, dest_path)
-        elif dev == 'Huawei':
-            shutil.move(path, os.path.join(HW_LOG_DIR, os.path.basename(path)))
-        else:
-            print(f"⚠️ 跳过未知类型文件: {path}")
-    print("✅ 分类完成。")
+    if os.name == 'nt':
+        os.rename(src, dest)  # Windows下目标已存在时rename即抛出FileExistsError
+        return
+    # POSIX下rename会直接覆盖目标,改用硬链接(目标已存在时抛出FileExistsError)后删除源文件
+    try:
+        os.link(src, dest)
+    except FileExistsError:
+        raise
+    except OSError:
+        # 不支持硬链接的文件系统(vfat/exFAT U盘、部分SMB共享等): 先检查目标再移动
+        if os.path.exists(dest):
+            raise FileExistsError(dest)
+        shutil.move(src, dest)
+        return
+    os.unlink(src)
+
+
+def detect_type(buf):
+    """识别日志文件类型(H3C / Huawei)
+    在日志原始字节中查找首个厂商关键字,直接做忽略大小写的字节正则搜索,无需逐行解码和转小写;
+    厂商标识通常位于日志开头,找到即停止,不会访问映射的其余部分
+
+    参数:
+        buf: 日志内容的内存映射(或空文件的b'')
+    返回:
+        str: 'Huawei'、'H3C'或None(未知类型)
+    """
+    m = DETECT_RE.search(buf)
+    if not m:
+        return None
+    if m.group().lower() == b'huawei':
+        return 'Huawei'
+    # 同一行中先出现h3c后出现huawei时仍判为华为(与逐行判断一致)
+    e = LINE_END_RE.search(buf, m.end())
+    if HUAWEI_RE.search(buf, m.end(), e.start() if e else len(buf)):
+        return 'Huawei'
+    return 'H3C'
+
 
 
 # ——— 华为日志解析部分 ———
@@ -94,174 +132,331 @@ def classify_logs():
 # 匹配设备名称模式,支持[]或<>包裹的SD-JN/JY开头的设备标识
 BRACKET_RE = re.compile(
     r'\[(SD-(?:JN|JY)-[^\]]+)\]|<(SD-(?:JN|JY)-[^>]+)>', re.MULTILINE)
-# 匹配条形码信息,提取BarCode=后的非空白字符
-BARCODE_RE = re.compile(r'BarCode=(\S+)')
-# 匹配简单CPU使用率格式 (CPU Usage : x% Max : y%)
-CPU_SIMPLE_RE = re.compile(
-    r'CPU Usage\s*:\s*([\d\.]+)%\s*Max\s*:\s*([\d\.]+)%')
-# 匹配控制平面CPU使用率格式 (Control Plane ... CPU Usage: x% Max: y%)
-CPU_CTRL_RE = re.compile(
-    r'Control Plane[\s\S]*?CPU Usage:\s*([\d\.]+)%\s*Max:\s*([\d\.]+)%')
-# 匹配内存使用量 (Total Memory Used Is: x bytes)
-MEM_USED_RE = re.compile(r'Total Memory Used Is:\s*(\d+)\s*bytes')
-# 匹配内存使用率 (Memory Using Percentage Is: x%)
-MEM_PCT_RE = re.compile(r'Memory Using Percentage Is:\s*([\d\.]+)%')
-
-
-def parse_huawei_logs():
-    """解析华为设备日志并生成CSV报告
-    1. 检查日志目录是否存在及包含日志文件
-    2. 遍历日志文件,提取设备信息、硬件指标
-    3. 处理异常情况并记录错误
-    4. 将提取结果写入CSV文件
+# 字节版设备名称匹配,直接在内存映射上搜索
+BRACKET_BYTES_RE = re.compile(rb'\[(SD-(?:JN|JY)-[^\]]+)\]|<(SD-(?:JN|JY)-[^>]+)>')
+# ANSI控制字符和特殊字符的首字节(ESC/BEL/BS)
+CTRL_BYTES_RE = re.compile(rb'[\x1b\x07\x08]')
+# 硬件信息合并匹配(字节模式) - 直接在内存映射上finditer扫描,按外层命名组(lastgroup)分派,各字段取首次出现
+HW_INFO_RE = re.compile(
+    # 条形码信息,提取BarCode=后的非空白字符
+    rb'(?P<sn>BarCode=(?P<sn_val>\S+))'
+    # 内存使用量 (Total Memory Used Is: x bytes)
+    rb'|(?P<mem_used>Total Memory Used Is:\s*(?P<mem_used_val>\d+)\s*bytes)'
+    # 内存使用率 (Memory Using Percentage Is: x%)
+    rb'|(?P<mem_pct>Memory Using Percentage Is:\s*(?P<mem_pct_val>[\d\.]+)%)'
+    # 控制平面标记 (Control Plane ... CPU Usage: x% Max: y%),其后首个控制平面格式的CPU行即为控制平面CPU
+    rb'|(?P<ctrl_plane>Control Plane)'
+    # 简单CPU使用率 (CPU Usage : x% Max : y%)
+    rb'|(?P<cpu_simple>CPU Usage\s*:\s*(?P<simple_usage>[\d\.]+)%\s*Max\s*:\s*(?P<simple_max>[\d\.]+)%)')
+# 控制平面CPU行格式 (CPU Usage: x% Max: y%),用于判断简单格式的匹配是否同时满足控制平面格式
+CPU_CTRL_LINE_RE = re.compile(rb'CPU Usage:\s*[\d\.]+%\s*Max:\s*[\d\.]+%')
+# 字段种类数(条形码/内存量/内存率/控制平面标记/简单CPU/控制平面CPU),全部找到后提前结束扫描
+HW_INFO_KINDS = 6
+# 按文本模式的规则切分行(\r\n、\r、\n均为行结束符)
+LINE_RE = re.compile(rb'[^\r\n]*(?:\r\n?|\n)?')
+
+
+def decode_text(b):
+    """将日志中的字节解码为文本,忽略无效的UTF-8字节,行结束符统一为\\n(与文本模式读取一致)"""
+    return b.decode('utf-8', 'ignore').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def find_device(buf):
+    """查找华为日志中的设备名称
+    先在映射上直接做一次字节搜索; 仅当匹配结束位置之前(未匹配时为全文)含控制字符时,
+    才解码全文并移除ANSI控制字符后重新搜索,结果与清理后全文搜索一致
+
+    参数:
+        buf: 日志内容的内存映射(或空文件的b'')
+    返回:
+        str: 设备名称,未找到时为None
+    """
+    m = BRACKET_BYTES_RE.search(buf)
+    if not CTRL_BYTES_RE.search(buf, 0, m.end() if m else len(buf)):
+        return decode_text(m.group(1) or m.group(2)) if m else None
+    m = BRACKET_RE.search(strip_ansi(decode_text(buf[:])))
+    return m.group(1) or m.group(2) if m else None  # 处理两种可能的捕获组
+
 
+def parse_huawei(buf, fp):
+    """解析单个华为日志文件
+    参数:
+        buf: 日志内容的内存映射(或空文件的b'')
+        fp: 日志文件路径
     返回:
-        list: 包含所有设备信息字典的列表
+        tuple: 按CSV_FIELDS顺序排列的设备信息行,处理出错时返回None
     """
-    rows = []
-    # 目录检查 - 确保日志目录存在
-    if not os.path.exists(HW_LOG_DIR):
-        print(f"错误：华为日志目录{HW_LOG_DIR}不存在")
-        return []
-    # 获取所有.log文件 - 可扩展支持其他格式
-    log_files = glob.glob(os.path.join(HW_LOG_DIR, '*.log'))
-    if not log_files:
-        print(f"警告：在{HW_LOG_DIR}未找到任何.log文件")
-        return []
-
-    # 遍历处理每个日志文件
-    for fp in log_files:
-        try:
-            with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-                txt = f.read()  # 读取整个文件内容
-
-            # 清理文本 - 移除ANSI控制字符和特殊字符
-            clean_text = re.sub(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', '', txt)
-            device = None
-            # 提取设备名称 - 优先从文本中匹配设备标识
-            m = BRACKET_RE.search(clean_text)
-            if m:
-                device = m.group(1) or m.group(2)  # 处理两种可能的捕获组
-            # 设备名称提取失败时使用文件名作为回退
-            if not device:
-                device = os.path.basename(fp)
-                print(f"警告：未从{fp}中提取到设备名称,使用文件名代替")
-
-            # 提取硬件信息 - 构建信息字典
-            # 每个字段使用条件表达式处理匹配失败的情况
-            info = {
-                'SN': BARCODE_RE.search(txt).group(1) if BARCODE_RE.search(txt) else '',
-                'TotalUsed(bytes)': MEM_USED_RE.search(txt).group(1) if MEM_USED_RE.search(txt) else '',
-                'UsedPct(%)': f"{float(MEM_PCT_RE.search(txt).group(1)):.2f}%" if MEM_PCT_RE.search(txt) else '',
-                'CPU_Usage(%)': '',  # 初始化为空,后续填充
-                'CPU_Max(%)': '',     # 初始化为空,后续填充
-                'LogFileName': os.path.basename(fp)
-            }
-
-            # 提取CPU信息 - 优先匹配控制平面CPU,再尝试简单格式
-            m = CPU_CTRL_RE.search(txt) or CPU_SIMPLE_RE.search(txt)
-            if m:
-                info['CPU_Usage(%)'] = f"{float(m.group(1)):.2f}%" if m.group(
-                    1) else ''
-                info['CPU_Max(%)'] = f"{float(m.group(2)):.2f}%" if m.group(
-                    2) else ''
-
-            # 添加设备名称并收集结果
-            info['Device'] = device
-            rows.append(info)
-        except Exception as e:
-            # 捕获并记录处理单个文件时的异常
-            print(f"❌ Huawei 文件错误: {fp} - {e}")
-
-    # 写入CSV报告 - 使用utf-8编码确保中文正常显示
-    with open(HW_OUT, 'w', newline='', encoding='utf-8') as f:
-        # 定义CSV字段顺序
-        writer = csv.DictWriter(f, fieldnames=[
-                                'Device', 'SN', 'CPU_Usage(%)', 'CPU_Max(%)', 'TotalUsed(bytes)', 'UsedPct(%)', 'LogFileName'])
-        writer.writeheader()  # 写入表头
-        writer.writerows(rows)  # 写入所有数据行
-    print(f"✅ Huawei 日志解析完成,共处理 {len(rows)} 个文件。")
+    log_name = os.path.basename(fp)
+    try:
+        # 提取设备名称 - 在移除ANSI控制字符和特殊字符后的文本中匹配设备标识
+        device = find_device(buf)
+
+        # 提取硬件信息 - 在映射上直接扫描,记录每种字段的首个匹配,全部找到后提前结束
+        found = {}
+        for m in HW_INFO_RE.finditer(buf):
+            kind = m.lastgroup
+            # 控制平面标记之后首个控制平面格式的CPU行
+            if (kind == 'cpu_simple' and 'ctrl_plane' in found and 'cpu_ctrl' not in found
+                    and CPU_CTRL_LINE_RE.fullmatch(buf, m.start(), m.end())):
+                found['cpu_ctrl'] = m
+            if kind not in found:
+                found[kind] = m
+                if len(found) == HW_INFO_KINDS:
+                    break
+
+        # 设备名称提取失败时使用文件名作为回退
+        if not device:
+            device = log_name
+            print(f"警告：未从{fp}中提取到设备名称,使用文件名代替")
+
+        # 提取硬件信息,只解码捕获到的字段,匹配失败的字段留空
+        m = found.get('sn')
+        serial = decode_text(m.group('sn_val')) if m else ''
+        m = found.get('mem_used')
+        total_used = m.group('mem_used_val').decode() if m else ''
+        m = found.get('mem_pct')
+        used_pct = f"{float(m.group('mem_pct_val').decode()):.2f}%" if m else ''
+
+        # 提取CPU信息 - 优先使用控制平面CPU,再使用简单格式
+        cpu_usage = cpu_max = ''
+        if m := found.get('cpu_ctrl') or found.get('cpu_simple'):
+            usage, usage_max = m.group('simple_usage', 'simple_max')
+            cpu_usage = f"{float(usage.decode()):.2f}%" if usage else ''
+            cpu_max = f"{float(usage_max.decode()):.2f}%" if usage_max else ''
+
+        return (device, serial, cpu_usage, cpu_max, total_used, used_pct, log_name)
+    except Exception as e:
+        # 捕获并记录处理单个文件时的异常
+        print(f"❌ Huawei 文件错误: {fp} - {e}")
+        return None
 
 
 # ——— H3C 日志解析部分 ———
-# 匹配内存信息 (Mem: total used free)
-MEM_RE = re.compile(r'Mem:\s*(\d+)\s*(\d+)\s*(\d+)')
-# 匹配CPU使用率 (xx% in last yy seconds/minutes)
-CPU_RE = re.compile(r'(\d+)% in last\s+(\d+)\s+(seconds?|minutes?)')
-# 匹配设备序列号 (DEVICE_SERIAL_NUMBER : SNxxx)
-SN_RE = re.compile(r'DEVICE_SERIAL_NUMBER\s*:\s*(\S+)')
+# 字段合并匹配(字节模式) - 在内存映射上一次finditer,按外层命名组(lastgroup)分派
+# 空白用[^\S\r\n]限定在同一行内,与逐行匹配结果一致
+H3C_INFO_RE = re.compile(
+    # 内存信息 (Mem: total used free)
+    rb'(?P<mem>Mem:[^\S\r\n]*(?P<total>\d+)[^\S\r\n]*(?P<used>\d+)[^\S\r\n]*\d+)'
+    # CPU使用率 (xx% in last yy seconds/minutes)
+    rb'|(?P<cpu>(?P<pct>\d+)% in last[^\S\r\n]+(?P<num>\d+)[^\S\r\n]+(?P<unit>seconds?|minutes?))'
+    # 设备序列号 (DEVICE_SERIAL_NUMBER : SNxxx)
+    rb'|(?P<sn>DEVICE_SERIAL_NUMBER[^\S\r\n]*:[^\S\r\n]*(?P<serial>\S+))')
 # 复用华为设备名称匹配正则
 DEVNAME_RE = BRACKET_RE
 
 
-def parse_h3c_logs():
-    """解析H3C设备日志并生成CSV报告
-    1. 检查日志目录是否存在及包含日志文件
-    2. 遍历日志文件，提取设备信息、CPU和内存指标
-    3. 计算CPU使用率的最小值和最大值
-    4. 计算内存使用率百分比
-    5. 将提取结果写入CSV文件
+def parse_h3c(buf, fp):
+    """解析单个H3C日志文件
+    参数:
+        buf: 日志内容的内存映射(或空文件的b'')
+        fp: 日志文件路径
+    返回:
+        tuple: 按CSV_FIELDS顺序排列的设备信息行,处理出错时返回None
+    """
+    log_name = os.path.basename(fp)
+    try:
+        total_kb = used_kb = None
+        cpu_stats = {}  # 初始化CPU统计字典
+        serial = ''     # 初始化序列号
+        line_kinds = set()  # (行起始位置, 字段种类), 同一行内每种字段只取首个匹配
+        # 直接在映射上finditer,不把文件读入内存,也不解码整个文件
+        for m in H3C_INFO_RE.finditer(buf):
+            kind = m.lastgroup
+            start = m.start()
+            line_start = buf.rfind(b'\n', 0, start)
+            line_start = max(line_start, buf.rfind(b'\r', line_start + 1, start))
+            key = (line_start, kind)
+            if key in line_kinds:
+                continue
+            line_kinds.add(key)
+            if kind == 'mem':
+                total_kb, used_kb = int(m.group('total')), int(m.group('used'))
+            elif kind == 'cpu':
+                pct, num, unit = m.group('pct', 'num', 'unit')
+                secs = int(num) * (60 if b'minute' in unit else 1)
+                cpu_stats[secs] = int(pct)
+            else:
+                serial = decode_text(m.group('serial'))
+        # 前50行解码后一次性清理
+        head_end = 0
+        for _, line in zip(range(50), LINE_RE.finditer(buf)):
+            head_end = line.end()
+        clean_head = strip_ansi(decode_text(buf[:head_end]))
+        m = DEVNAME_RE.search(clean_head)
+        device = m.group(1) or m.group(2) if m else log_name
+        # 添加提取失败警告
+        if not m:
+            print(f"警告：未从{fp}中提取到设备名称，使用文件名代替")
+        # 计算内存使用率百分比并保留两位小数
+        used_pct = round(used_kb * 100 / total_kb,
+                        2) if (used_kb and total_kb) else ''
+        # 提取CPU使用率统计值
+        cpu_min = min(cpu_stats.values()) if cpu_stats else ''
+        cpu_max = max(cpu_stats.values()) if cpu_stats else ''
+        return (device,
+                serial,
+                f"{float(cpu_min):.2f}%" if cpu_min else '',
+                f"{float(cpu_max):.2f}%" if cpu_max else '',
+                used_kb or '',
+                f"{used_pct:.2f}%" if used_pct else '',
+                log_name)
+    except Exception as e:
+        print(f"❌ H3C 文件错误: {fp} - {e}")
+        return None
+
+
+# ——— 识别、解析与分类 ———
+
+
+def process_file(task):
+    """识别并解析单个日志文件(供进程池调用)
+    每个文件只打开一次并以只读方式内存映射: 厂商识别和字段提取都直接在映射上进行,
+    不把文件复制到进程内存,也不解码整个文件
 
+    参数:
+        task: (日志文件路径, 已知厂商类型, 子目录中已有同名文件的厂商集合);
+              厂商子目录中的文件类型已知,不再识别
     返回:
-        list: 包含所有设备信息字典的列表
+        tuple: (厂商类型, 设备信息行), 未知类型时为(None, None);
+               同名文件已存在(不会被移动)或文件无法读取时不解析,设备信息行为None
     """
-    rows = []
-    # 添加目录检查
-    if not os.path.exists(H3C_LOG_DIR):
-        print(f"错误：H3C日志目录{H3C_LOG_DIR}不存在")
-        return []
-    log_files = glob.glob(os.path.join(H3C_LOG_DIR, '*.log'))
-    # 添加文件存在检查
-    if not log_files:
-        print(f"警告：在{H3C_LOG_DIR}未找到任何.log文件")
-        return []
-    for fp in log_files:
-        try:
-            # 使用with上下文管理器安全打开文件
-            with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.read().splitlines()
-            clean_head = '\n'.join(
-                [re.sub(r'\x1b\[\d+[A-Za-z]|[\x07\x08]', '', ln) for ln in lines[:50]])
-            m = DEVNAME_RE.search(clean_head)
-            device = m.group(1) or m.group(2) if m else os.path.basename(fp)
-            # 添加提取失败警告
-            if not m:
-                print(f"警告：未从{fp}中提取到设备名称，使用文件名代替")
-            total_kb = used_kb = None
-            cpu_stats = {}  # 初始化CPU统计字典
-            serial = ''     # 初始化序列号
-            for ln in lines:
-                if mm := MEM_RE.search(ln):
-                    total_kb, used_kb = map(int, mm.groups()[:2])
-                if mc := CPU_RE.search(ln):
-                    pct, num, unit = mc.groups()
-                    secs = int(num) * (60 if 'minute' in unit else 1)
-                    cpu_stats[secs] = int(pct)
-                if ms := SN_RE.search(ln):
-                    serial = ms.group(1)
-            # 计算内存使用率百分比并保留两位小数
-            used_pct = round(used_kb * 100 / total_kb,
-                            2) if (used_kb and total_kb) else ''
-            # 提取CPU使用率统计值
-            cpu_min = min(cpu_stats.values()) if cpu_stats else ''
-            cpu_max = max(cpu_stats.values()) if cpu_stats else ''
-            rows.append({
-                'Device': device,
-                'SN': serial,
-                'CPU_Usage(%)': f"{float(cpu_min):.2f}%" if cpu_min else '',
-                'CPU_Max(%)': f"{float(cpu_max):.2f}%" if cpu_max else '',
-                'TotalUsed(bytes)': used_kb or '',
-                'UsedPct(%)': f"{used_pct:.2f}%" if used_pct else '',
-                'LogFileName': os.path.basename(fp)
-            })
-        except Exception as e:
-            print(f"❌ H3C 文件错误: {fp} - {e}")
-    with open(H3C_OUT, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-                                'Device', 'SN', 'CPU_Usage(%)', 'CPU_Max(%)', 'TotalUsed(bytes)', 'UsedPct(%)', 'LogFileName'])
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"✅ H3C 日志解析完成,共处理 {len(rows)} 个文件。")
+    fp, dev, taken = task
+    try:
+        with open(fp, 'rb') as f:
+            # 空文件无法映射,按空内容处理
+            if os.fstat(f.fileno()).st_size:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                mapping = contextlib.nullcontext(b'')
+            with mapping as buf:
+                if dev is None:
+                    dev = detect_type(buf)
+                    if dev is None or dev in taken:
+                        return dev, None
+                if dev == 'Huawei':
+                    return dev, parse_huawei(buf, fp)
+                return dev, parse_h3c(buf, fp)
+    except (OSError, ValueError) as e:
+        # 文件被其他程序占用、列出后被删除等: 记录错误后跳过本文件,不中断整个处理
+        print(f"❌ 读取文件错误: {fp} - {e}")
+        return dev, None
+
+
+def format_csv_row(row):
+    """将一行数据格式化为CSV文本(含行尾\\r\\n,与csv模块默认格式一致)
+    设备名、序列号、百分比等字段通常不含特殊字符,直接拼接;
+    含逗号、引号或换行时交给csv模块处理引号转义
+
+    参数:
+        row: 字段序列
+    返回:
+        str: CSV格式的一行文本
+    """
+    line = ','.join(map(str, row))
+    if line.count(',') == len(row) - 1 and '"' not in line and '\r' not in line and '\n' not in line:
+        return line + '\r\n'
+    buf = io.StringIO()
+    csv.writer(buf).writerow(row)
+    return buf.getvalue()
+
+
+def open_results(out_path):
+    """创建CSV报告并写入表头,之后每个文件解析完成即追加一行,不在内存中累积所有结果
+    参数:
+        out_path: CSV输出路径
+    返回:
+        已打开的CSV文件对象
+    """
+    # 使用utf-8编码确保中文正常显示
+    f = open(out_path, 'w', newline='', encoding='utf-8')
+    f.write(format_csv_row(CSV_FIELDS))
+    return f
+
+
+def finish_results(vendor, out_path, log_dir, f, row_count, file_count):
+    """结束某一厂商的CSV报告并输出统计
+    参数:
+        vendor: 厂商名称
+        out_path: CSV输出路径
+        log_dir: 该厂商的日志目录
+        f: 已打开的CSV文件,尚未写入数据行时为None
+        row_count: 已写入的设备信息行数
+        file_count: 该厂商目录中的日志文件数
+    """
+    if not file_count:
+        print(f"警告：在{log_dir}未找到任何.log文件")
+        return
+    if f is None:
+        open_results(out_path).close()  # 没有解析成功的文件时仍生成只含表头的报告
+    print(f"✅ {vendor} 日志解析完成,共处理 {row_count} 个文件。")
+
+
+def classify_logs():
+    """识别、解析日志文件并分类移动到对应厂商的子目录
+    1. LOG_DIR中的新日志: 识别类型并解析,随后移动到H3C_LOG_DIR或HW_LOG_DIR
+    2. 厂商子目录中已有的日志: 按所在目录的类型直接解析
+    3. 各文件相互独立,使用进程池并行处理,每个文件只打开一次
+    4. 每个文件处理完成即把结果追加到对应厂商的CSV文件,解析、移动与写入交替进行
+    已存在文件会跳过移动并给出警告(以子目录中已有的文件为准)
+    """
+    print("🔍 分类整理日志...")
+    # 仅处理.log文件,可根据需要扩展支持其他格式
+    new_files = list_logs(LOG_DIR)
+    hw_files = list_logs(HW_LOG_DIR)
+    h3c_files = list_logs(H3C_LOG_DIR)
+    # 用已列出的子目录文件名判断同名冲突,冲突的新日志不必解析
+    hw_names = {os.path.basename(p) for p in hw_files}
+    h3c_names = {os.path.basename(p) for p in h3c_files}
+    tasks = []
+    for p in new_files:
+        name = os.path.basename(p)
+        taken = frozenset(v for v, names in (('Huawei', hw_names), ('H3C', h3c_names)) if name in names)
+        tasks.append((p, None, taken))
+    tasks += [(p, 'Huawei', frozenset()) for p in hw_files]
+    tasks += [(p, 'H3C', frozenset()) for p in h3c_files]
+    counts = {'Huawei': len(hw_files), 'H3C': len(h3c_files)}
+    out_paths = {'Huawei': HW_OUT, 'H3C': H3C_OUT}
+    outputs = {}  # 厂商 -> 已打开的CSV文件,收到该厂商的首个数据行时创建
+    written = {'Huawei': 0, 'H3C': 0}
+
+    with contextlib.ExitStack() as stack:
+        # 按CPU核数并行处理; imap按提交顺序逐个返回,输出顺序与串行一致
+        with multiprocessing.Pool(os.cpu_count()) as pool:
+            for (path, known, taken), (dev, row) in zip(tasks, pool.imap(process_file, tasks, chunksize=8)):
+                if dev is None:
+                    print(f"⚠️ 跳过未知类型文件: {path}")
+                    continue
+                if known is None:
+                    # 新日志解析完成后移动到厂商子目录(Windows下文件打开期间无法移动)
+                    dest_path = os.path.join(HW_LOG_DIR if dev == 'Huawei' else H3C_LOG_DIR,
+                                             os.path.basename(path))
+                    # 列目录时已知存在同名文件的不再尝试移动; 移动在子进程解析其他文件期间进行
+                    moved = dev not in taken
+                    if moved:
+                        try:
+                            move_log(path, dest_path)
+                        except FileExistsError:
+                            moved = False
+                        except OSError as e:
+                            # 移动失败(权限、文件被占用等)时保留原文件,跳过本文件继续处理其余日志
+                            print(f"❌ 移动文件失败: {path} - {e}")
+                            continue
+                    if not moved:
+                        # 不覆盖已有文件,子目录中的同名文件已单独解析
+                        print(f"⚠️ {dest_path}已存在,跳过移动")
+                        continue
+                    counts[dev] += 1
+                if row:
+                    if dev not in outputs:
+                        outputs[dev] = stack.enter_context(open_results(out_paths[dev]))
+                    outputs[dev].write(format_csv_row(row))
+                    written[dev] += 1
+        print("✅ 分类完成。")
+
+        for vendor, log_dir in (('Huawei', HW_LOG_DIR), ('H3C', H3C_LOG_DIR)):
+            finish_results(vendor, out_paths[vendor], log_dir, outputs.get(vendor),
+                           written[vendor], counts[vendor])
+
 
 # ——— 主函数 ———
 
@@ -269,11 +464,10 @@ def parse_h3c_logs():
 def main():
     ensure_dirs()
     classify_logs()
-    parse_huawei_logs()
-    parse_h3c_logs()
     print("🎉 所有巡检日志处理完成。")
     input("按任意键退出...")
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # 支持打包为EXE后使用进程池
     main()